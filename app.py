@@ -11,6 +11,7 @@ from backends.mock_backend import MockBackend
 APP_TITLE = "AT Command Tester"
 DEFAULT_BAUD = 115200
 EOL = "\n"
+CACHE_DIRECTIVE = "#!cache"  # nel file comandi: risposte statiche (ATI, AT+GMR, ...) dalla cache identità
 
 class ATTesterApp(ttk.Frame):
     def __init__(self, master):
@@ -35,8 +36,8 @@ class ATTesterApp(ttk.Frame):
 
         # Demo toggle
         self.demo_var = tk.BooleanVar(value=False)
-        demo_chk = ttk.Checkbutton(top, text="Modalità DEMO (senza seriale)", variable=self.demo_var, command=self._on_demo_toggle)
-        demo_chk.pack(side=tk.LEFT, padx=(0,12))
+        self.demo_chk = ttk.Checkbutton(top, text="Modalità DEMO (senza seriale)", variable=self.demo_var, command=self._on_demo_toggle)
+        self.demo_chk.pack(side=tk.LEFT, padx=(0,12))
 
         ttk.Label(top, text="Porta:").pack(side=tk.LEFT)
         self.port_var = tk.StringVar()
@@ -157,12 +158,38 @@ class ATTesterApp(ttk.Frame):
             messagebox.showwarning(APP_TITLE, "Seleziona una porta (o DEMO)")
             return
         baud = int(self.baud_var.get() or DEFAULT_BAUD)
+        # connect() esegue anche il probe del modem (alcuni giri sulla seriale):
+        # lo si fa in un thread per non bloccare la GUI
+        mode = "DEMO" if self.demo_var.get() else f"{port} @ {baud}"
+        self.status_var.set("Connessione…")
+        self._set_connecting(True)
+        threading.Thread(target=self._connect_thread, args=(be, mode, port, baud), daemon=True).start()
+
+    def _set_connecting(self, busy):
+        # durante connect + probe non si cambia backend, porta o baud e non si inviano comandi
+        state = tk.DISABLED if busy else tk.NORMAL
+        for w in (self.connect_btn, self.send_btn, self.entry, self.run_btn, self.demo_chk):
+            w.config(state=state)
+        combo_state = tk.DISABLED if busy else "readonly"
+        self.port_cb.config(state=combo_state)
+        self.baud_cb.config(state=combo_state)
+
+    def _connect_thread(self, be, mode, port, baud):
         try:
             be.connect(port, baud)
+            err = None
         except Exception as e:
-            messagebox.showerror(APP_TITLE, f"Errore connessione: {e}")
+            err = e
+        self.master.after(0, lambda: self._after_connect(be, mode, err))
+
+    def _after_connect(self, be, mode, err):
+        self._set_connecting(False)
+        if err is not None:
+            self.status_var.set("Disconnesso")
+            messagebox.showerror(APP_TITLE, f"Errore connessione: {err}")
             return
-        mode = "DEMO" if self.demo_var.get() else f"{port} @ {baud}"
+        if be.identity is not None:
+            mode += f" ({be.identity.firmware})"
         self.status_var.set(f"Connesso a {mode}")
         self.connect_btn.config(text="Disconnetti")
 
@@ -240,10 +267,14 @@ class ATTesterApp(ttk.Frame):
 
     def _parse_file(self, path):
         cmds = []
+        use_cache = False
         try:
             with open(path, "r", encoding="utf-8") as f:
                 for line in f:
                     line = line.strip()
+                    if line.lower() == CACHE_DIRECTIVE:
+                        use_cache = True
+                        continue
                     if not line or line.startswith('#'):
                         continue
                     else:
@@ -251,13 +282,13 @@ class ATTesterApp(ttk.Frame):
                     cmds.append(cmd)
         except Exception as e:
             messagebox.showerror(APP_TITLE, f"Errore lettura file: {e}")
-        return cmds
+        return cmds, use_cache
 
     def _run_file_thread(self):
         be = self._current_backend()
         path = self.file_var.get().strip()
         delay_ms = max(0, self.delay_var.get())
-        cmds = self._parse_file(path)
+        cmds, use_cache = self._parse_file(path)
         if not cmds:
             self.master.after(0, lambda: self._batch_done("Nessun comando trovato"))
             return
@@ -267,7 +298,7 @@ class ATTesterApp(ttk.Frame):
                 break
             self.master.after(0, lambda c=cmd: self._log(self.txt_file, 'input', c))
             try:
-                resp = be.send_and_read(cmd)
+                resp = be.query(cmd, use_cache=use_cache)
             except Exception as e:
                 resp = f"ERROR: {e}"
             self.master.after(0, lambda r=resp: self._log(self.txt_file, 'output', r.strip()))
@@ -1,4 +1,5 @@
 from .base_backend import ATBackend
 from .serial_backend import SerialBackend
 from .mock_backend import MockBackend
-__all__ = ["ATBackend", "SerialBackend", "MockBackend"]
+from .identity_cache import IDENTITY_CACHE, IdentityCache, ModemIdentity
+__all__ = ["ATBackend", "SerialBackend", "MockBackend", "IDENTITY_CACHE", "IdentityCache", "ModemIdentity"]
@@ -1,9 +1,17 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
+
+from .identity_cache import (
+    IDENTITY_CACHE, PROBE_QUERIES, ModemIdentity, imei_from, is_ok, payload_lines, result_code_style,
+)
 
 class ATBackend(ABC):
     """Interfaccia comune per backend (seriale reale o demo)."""
 
+    def __init__(self):
+        self.identity: Optional[ModemIdentity] = None
+        self.result_codes: Optional[str] = None  # 'verbose'/'numeric' nella sessione corrente
+
     @abstractmethod
     def list_ports(self) -> List[str]:
         pass
@@ -23,3 +31,59 @@ class ATBackend(ABC):
     @abstractmethod
     def send_and_read(self, cmd_text: str) -> str:
         pass
+
+    def query(self, cmd_text: str, use_cache: bool = False) -> str:
+        """Come send_and_read, ma con use_cache le query statiche arrivano dalla cache identità."""
+        if use_cache and self.identity is not None:
+            cached = self.identity.cached_response(cmd_text, self.result_codes)
+            if cached is not None:
+                return cached
+        resp = self.send_and_read(cmd_text)
+        if use_cache and self.identity is not None:
+            self.identity.remember(cmd_text, resp)
+        return resp
+
+    def _probe_identity(self, port_key: Optional[str] = None):
+        """Interroga il modem appena connesso e aggiorna la cache identità.
+
+        Il probe è facoltativo: qualunque errore lascia la connessione aperta
+        senza identità, e i comandi seguono il percorso normale.
+        """
+        self.identity = None
+        self.result_codes = None
+        try:
+            self._run_probe(port_key)
+        except Exception:
+            self.identity = None
+
+    def _run_probe(self, port_key: Optional[str]):
+        # AT+GMR e AT+CGSN vengono riletti a ogni connessione: la voce in cache si
+        # riusa solo se firmware e IMEI coincidono, altrimenti la si scarta e si
+        # rifà il probe completo. Senza IMEI non si può verificare che sulla porta
+        # ci sia lo stesso modem, quindi l'identità resta limitata alla sessione.
+        gmr = self.send_and_read("AT+GMR")
+        firmware = " ".join(payload_lines("AT+GMR", gmr))
+        if not is_ok(gmr) or not firmware:
+            return
+        # ATV0/ATV1 vale per la sessione corrente: si ricava dalla risposta appena letta,
+        # così anche il resto del probe usa già i terminatori giusti.
+        self.result_codes = result_code_style(gmr)
+
+        cgsn = self.send_and_read("AT+CGSN")
+        imei = imei_from(cgsn)
+        key = (port_key or f"imei:{imei}") if imei else None
+
+        cached = IDENTITY_CACHE.get(key)
+        if cached is not None and cached.matches(firmware, imei):
+            self.identity = cached
+            return
+        IDENTITY_CACHE.invalidate(key)
+
+        identity = ModemIdentity(key, firmware, imei)
+        identity.remember("AT+GMR", gmr)
+        identity.remember("AT+CGSN", cgsn)
+        for cmd in PROBE_QUERIES:
+            identity.remember(cmd, self.send_and_read(cmd))
+        identity.update_capabilities()
+        IDENTITY_CACHE.put(identity)
+        self.identity = identity
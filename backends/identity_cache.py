@@ -0,0 +1,208 @@
+from typing import Dict, List, Optional, Set
+
+# Query "statiche": la risposta dipende solo da modem e firmware, quindi si possono
+# servire dalla cache senza rifare il giro sulla seriale.
+STATIC_QUERIES = (
+    "ATI", "AT+GMR", "AT+CGMR", "AT+GMI", "AT+CGMI", "AT+GMM", "AT+CGMM",
+    "AT+GSN", "AT+CGSN", "AT+GCAP", "AT+CMUX=?",
+)
+
+# Query eseguite una sola volta alla connessione (AT+GMR è già usato per la validazione).
+PROBE_QUERIES = ("ATI", "AT+GCAP")
+
+VERBOSE_FINAL = ("OK", "ERROR", "NO CARRIER", "BUSY", "NO ANSWER", "NO DIALTONE")
+NUMERIC_FINAL = ("0", "3", "4", "6", "7", "8")
+
+
+def normalize(cmd_text: str) -> str:
+    return cmd_text.strip().upper()
+
+
+def is_static(cmd_text: str) -> bool:
+    return normalize(cmd_text) in STATIC_QUERIES
+
+
+def payload_lines(cmd_text: str, resp: str) -> List[str]:
+    """Righe utili di una risposta: senza echo, righe vuote e codice finale."""
+    cmd = normalize(cmd_text)
+    lines = []
+    for line in resp.replace("\r", "\n").split("\n"):
+        line = line.strip()
+        if not line or line.upper() == cmd:
+            continue
+        if line in VERBOSE_FINAL or line in NUMERIC_FINAL:
+            continue
+        lines.append(line)
+    return lines
+
+
+def result_code_style(resp: str) -> Optional[str]:
+    """'verbose' (ATV1) o 'numeric' (ATV0) in base al codice finale, None se assente."""
+    lines = [l.strip() for l in resp.replace("\r", "\n").split("\n") if l.strip()]
+    if not lines:
+        return None
+    if lines[-1] in VERBOSE_FINAL or lines[-1].startswith(("+CME ERROR", "+CMS ERROR")):
+        return "verbose"
+    if lines[-1] in NUMERIC_FINAL:
+        return "numeric"
+    return None
+
+
+def imei_from(resp: str) -> str:
+    """Cifre dell'IMEI in una risposta AT+CGSN, stringa vuota se la risposta non è OK."""
+    if not is_ok(resp):
+        return ""
+    return "".join(c for c in " ".join(payload_lines("AT+CGSN", resp)) if c.isdigit())
+
+
+def result_codes_after(cmd_text: str, current: Optional[str], ok: bool) -> Optional[str]:
+    """Formato dei codici finali dopo un comando inviato a mano.
+
+    Legge V<n>, Z e &F dai comandi base (anche composti, es. ATE0V0 o AT&FV0);
+    i comandi estesi (+..., fino al ';') non lo cambiano. Se il comando non si
+    riesce a classificare, o tocca il formato ma fallisce, si restituisce None.
+    """
+    cmd = normalize(cmd_text)
+    if cmd.startswith("A/"):
+        return None  # ripete il comando precedente, che non conosciamo
+    if not cmd.startswith("AT"):
+        return current
+    body = cmd[2:]
+    style = current
+    touched = False
+    i = 0
+    while i < len(body):
+        c = body[i]
+        if c == ";" or c.isspace():
+            i += 1
+            continue
+        if c in "+%$^*#":
+            # comando esteso: arriva fino al prossimo ';'
+            j = body.find(";", i)
+            if j < 0:
+                break
+            i = j + 1
+            continue
+        if c == "D":
+            break  # il resto è il numero da comporre
+        if c == "&":
+            if i + 1 >= len(body) or not body[i + 1].isalpha():
+                return None
+            sub = body[i + 1]
+            i += 2
+            while i < len(body) and body[i].isdigit():
+                i += 1
+            if sub == "F":
+                style, touched = "verbose", True
+            continue
+        if c == "S":
+            # S<n>?, S<n>=<v>
+            i += 1
+            while i < len(body) and body[i].isdigit():
+                i += 1
+            if i < len(body) and body[i] == "?":
+                i += 1
+            elif i < len(body) and body[i] == "=":
+                i += 1
+                while i < len(body) and body[i].isdigit():
+                    i += 1
+            continue
+        if c.isalpha():
+            i += 1
+            start = i
+            while i < len(body) and body[i].isdigit():
+                i += 1
+            arg = body[start:i]
+            if i < len(body) and body[i] == "?":
+                i += 1
+                continue
+            if c == "V":
+                if arg in ("", "0"):
+                    style = "numeric"
+                elif arg == "1":
+                    style = "verbose"
+                else:
+                    return None
+                touched = True
+            elif c == "Z":
+                style, touched = "verbose", True
+            continue
+        return None
+    if touched and not ok:
+        return None
+    return style
+
+
+def is_ok(resp: str) -> bool:
+    lines = [l.strip() for l in resp.replace("\r", "\n").split("\n") if l.strip()]
+    return bool(lines) and lines[-1] in ("OK", "0")
+
+
+class ModemIdentity:
+    """Identità e capacità di un modem, ricavate dal probe alla connessione.
+
+    - `key`: numero di serie della porta ("sn:...") o IMEI ("imei:..."), None se ignoto.
+    - `firmware` e `imei`: riletti a ogni connessione per validare la voce in cache.
+    - `responses`: righe utili delle query statiche, senza echo né codice finale.
+    - `gcap`: voci di AT+GCAP (es. +CGSM abilita l'uscita anticipata sul prompt SMS).
+
+    Il formato dei codici finali (ATV0/ATV1) è un'impostazione di sessione e non
+    viene salvato qui: lo ricava il backend a ogni connessione.
+    """
+
+    def __init__(self, key: Optional[str], firmware: str, imei: str):
+        self.key = key
+        self.firmware = firmware
+        self.imei = imei
+        self.responses: Dict[str, List[str]] = {}
+        self.gcap: Set[str] = set()
+
+    def cached_response(self, cmd_text: str, result_codes: Optional[str] = None) -> Optional[str]:
+        """Risposta ricostruita dalla cache, con il codice finale della sessione corrente."""
+        lines = self.responses.get(normalize(cmd_text))
+        if lines is None:
+            return None
+        if result_codes == "numeric":
+            # ATV0: testo "<riga><CR><LF>", codice finale "<cifra><CR>"
+            return "".join(l + "\r\n" for l in lines) + "0\r"
+        return "\r\n".join(lines + ["OK"]) + "\r\n"
+
+    def remember(self, cmd_text: str, resp: str):
+        # si salva solo il contenuto: echo e codice finale dipendono dalla sessione (ATE/ATV)
+        if is_static(cmd_text) and is_ok(resp):
+            self.responses[normalize(cmd_text)] = payload_lines(cmd_text, resp)
+
+    def matches(self, firmware: str, imei: str) -> bool:
+        return self.firmware == firmware and self.imei == imei
+
+    def update_capabilities(self):
+        for line in self.responses.get("AT+GCAP", []):
+            if line.upper().startswith("+GCAP:"):
+                line = line[len("+GCAP:"):]
+            self.gcap.update(t.strip().upper() for t in line.split(",") if t.strip())
+
+
+class IdentityCache:
+    """Cache in memoria delle identità, condivisa tra le connessioni dell'app."""
+
+    def __init__(self):
+        self._entries: Dict[str, ModemIdentity] = {}
+
+    def get(self, key: Optional[str]) -> Optional[ModemIdentity]:
+        if key is None:
+            return None
+        return self._entries.get(key)
+
+    def put(self, identity: ModemIdentity):
+        if identity.key is not None:
+            self._entries[identity.key] = identity
+
+    def invalidate(self, key: Optional[str]):
+        if key is not None:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+IDENTITY_CACHE = IdentityCache()
@@ -8,6 +8,9 @@ _SAMPLE_RESPONSES = {
     "AT": "OK",
     "ATI": "Manufacturer: DemoCorp" + EOL + "Model: DEMO-01" + EOL + "Revision: 1.2.3" + EOL + "OK",
     "AT+GMR": "DEMO FW 1.2.3" + EOL + "OK",
+    "AT+CGSN": "351602000330570" + EOL + "OK",
+    "AT+GCAP": "+GCAP: +CGSM,+FCLASS,+DS" + EOL + "OK",
+    "AT+CMUX=?": "+CMUX: (0),(0),(1-5),(10-100),(1-255),(0-100),(2-255),(1-255),(1-7)" + EOL + "OK",
     "AT+CSQ": "+CSQ: 18,99" + EOL + "OK",
     "AT+CREG?": "+CREG: 0,1" + EOL + "OK",
     "AT+CMEE=2": "OK",
@@ -24,6 +27,7 @@ class MockBackend(ATBackend):
     """
 
     def __init__(self):
+        super().__init__()
         self.connected = False
 
     def list_ports(self) -> List[str]:
@@ -33,9 +37,12 @@ class MockBackend(ATBackend):
         if not port.startswith("DEMO"):
             raise RuntimeError("In DEMO seleziona la porta 'DEMO: Mock Modem'")
         self.connected = True
+        self._probe_identity()
 
     def disconnect(self):
         self.connected = False
+        self.identity = None
+        self.result_codes = None
 
     def is_connected(self) -> bool:
         return self.connected
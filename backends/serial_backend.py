@@ -1,5 +1,5 @@
 import time
-from typing import List
+from typing import List, Optional
 
 try:
     import serial
@@ -13,9 +13,11 @@ IDLE_GAP_S = 1  # aumentare per dare tempo alla risposta dopo l’echo
 EOL = "\n"
 
 from .base_backend import ATBackend
+from .identity_cache import NUMERIC_FINAL, is_ok, result_codes_after
 
 class SerialBackend(ATBackend):
     def __init__(self):
+        super().__init__()
         self.ser = None
 
     def list_ports(self) -> List[str]:
@@ -29,6 +31,31 @@ class SerialBackend(ATBackend):
         if self.ser and self.ser.is_open:
             self.ser.close()
         self.ser = serial.Serial(port=port, baudrate=baud, timeout=READ_TIMEOUT_S)
+        self._probe_identity(self._port_key(port))
+
+    def _port_key(self, port: str) -> Optional[str]:
+        """Numero di serie USB della porta, se disponibile (altrimenti si usa l'IMEI)."""
+        if list_ports is None:
+            return None
+        for p in list_ports.comports():
+            if p.device == port and p.serial_number:
+                return f"sn:{p.serial_number}"
+        return None
+
+    def _is_complete(self, txt: str) -> bool:
+        # terminatori tipici
+        if "OK" in txt or "ERROR" in txt or "+CME ERROR" in txt or "+CMS ERROR" in txt:
+            return True
+        # Fast path, per non attendere IDLE_GAP_S: il prompt SMS solo se il modem dichiara
+        # +CGSM in AT+GCAP (capacità in cache), i codici numerici solo se la sessione
+        # corrente è in ATV0 (stato di sessione, non in cache).
+        if txt.endswith("> ") and self.identity is not None and "+CGSM" in self.identity.gcap:
+            return True
+        if self.result_codes == "numeric" and txt.endswith("\r"):
+            # in ATV0 il codice finale è "<cifra><CR>": serve il CR per non troncare un dato
+            lines = [l.strip() for l in txt.replace("\r", "\n").split("\n") if l.strip()]
+            return bool(lines) and lines[-1] in NUMERIC_FINAL
+        return False
 
     def disconnect(self):
         if self.ser:
@@ -36,6 +63,8 @@ class SerialBackend(ATBackend):
                 self.ser.close()
             finally:
                 self.ser = None
+                self.identity = None
+                self.result_codes = None
 
     def is_connected(self) -> bool:
         return self.ser is not None and self.ser.is_open
@@ -56,13 +85,18 @@ class SerialBackend(ATBackend):
             if chunk:
                 buf.extend(chunk)
                 last_rx = time.time()
-                # terminatori tipici
                 txt = buf.decode(errors="ignore")
-                if "OK" in txt or "ERROR" in txt or "+CME ERROR" in txt or "+CMS ERROR" in txt:
+                if self._is_complete(txt):
                     break
             else:
                 if time.time() - last_rx > IDLE_GAP_S:
                     break
             if time.time() - start > 10:
                 break
-        return buf.decode("utf-8", errors="ignore")
\ No newline at end of file
+        resp = buf.decode("utf-8", errors="ignore")
+        self._track_result_codes(cmd_text, resp)
+        return resp
+
+    def _track_result_codes(self, cmd_text: str, resp: str):
+        # ATV0/ATV1, ATZ e AT&F inviati a mano cambiano il formato dei codici finali
+        self.result_codes = result_codes_after(cmd_text, self.result_codes, is_ok(resp))